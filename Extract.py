@@ -2,10 +2,16 @@
 
 from __future__ import annotations
 
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict
+from typing import Dict, Iterator, Sequence
 
 import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pcsv
+import pyarrow.parquet as pq
 
 # The CSV files already live in the repository, so we only need to read them.
 CSV_FILES: Dict[str, Path] = {
@@ -20,10 +26,247 @@ CSV_FILES: Dict[str, Path] = {
     "stocks": Path("Data opsætning") / "Data CSV" / "stocks.csv",
 }
 
+# Column types are declared up front so the parser does not have to infer
+# them and the ID columns come out at their final width. Columns that are not
+# listed are still inferred, so the streamed tables list every column to keep
+# all of their blocks on one schema. Prices stay float64 to keep totals exact
+# to the cent.
+CSV_DTYPES: Dict[str, Dict[str, str]] = {
+    "orders": {
+        "order_id": "int32",
+        "customer_id": "int32",
+        "order_status": "int8",
+        "staff_name": "string",
+        "store": "string",
+    },
+    "order_items": {
+        "order_id": "int32",
+        "item_id": "int32",
+        "product_id": "int32",
+        "quantity": "int16",
+        "list_price": "float64",
+        "discount": "float64",
+    },
+    "customers": {"customer_id": "int32"},
+    "brands": {"brand_id": "int32"},
+    "categories": {"category_id": "int32"},
+    "products": {
+        "product_id": "int32",
+        "brand_id": "int32",
+        "category_id": "int32",
+        "model_year": "int16",
+        "list_price": "float64",
+    },
+    "staffs": {"manager_id": "int32"},
+    "stocks": {"product_id": "int32", "quantity": "int32"},
+}
+
+# Date columns are parsed by the CSV reader itself, straight from the text
+# buffers, instead of being converted afterwards in the transform step.
+CSV_DATES: Dict[str, Sequence[str]] = {
+    "orders": ("order_date", "required_date", "shipped_date"),
+}
+DATE_FORMAT = "%d/%m/%Y"
+
+# The exports write missing values as the literal text "NULL".
+NULL_VALUES = ["", "NULL"]
+
+# The order tables grow with the business; they are streamed in blocks of
+# STREAM_BLOCK_SIZE bytes by ``extract_data_streaming`` instead of being loaded
+# whole.
+STREAMING_TABLES = frozenset({"orders", "order_items"})
+STREAM_BLOCK_SIZE = 64 << 20
+
+# Parsed tables are cached as Parquet next to the data so re-runs can skip the
+# CSV parser entirely. The cache is relative to ``base_path``.
+CACHE_DIR = Path(".cache")
+
+# The ConvertOptions settings that shape the parsed values. A cached table is
+# only reused when the CSV file and every one of these settings are unchanged.
+_KEYED_CONVERT_OPTIONS = (
+    "column_types",
+    "null_values",
+    "true_values",
+    "false_values",
+    "strings_can_be_null",
+    "quoted_strings_can_be_null",
+    "timestamp_parsers",
+    "decimal_point",
+    "include_columns",
+    "include_missing_columns",
+    "auto_dict_encode",
+    "auto_dict_max_cardinality",
+)
+
+
+def _column_types(name: str) -> Dict[str, pa.DataType]:
+    column_types = {
+        column: pa.type_for_alias(alias)
+        for column, alias in CSV_DTYPES.get(name, {}).items()
+    }
+    for column in CSV_DATES.get(name, ()):
+        column_types[column] = pa.timestamp("s")
+    return column_types
+
+
+def _with_column_types(
+    table: pa.Table | pa.RecordBatch, name: str
+) -> pa.Table | pa.RecordBatch:
+    """Cast ``table`` back to the column types declared for ``name``.
+
+    Parquet cannot store second-resolution timestamps, so date columns read
+    from the cache come back as ``timestamp[ms]`` unless they are cast.
+    """
+
+    column_types = _column_types(name)
+    schema = pa.schema(
+        [
+            field.with_type(column_types.get(field.name, field.type))
+            for field in table.schema
+        ],
+        metadata=table.schema.metadata,
+    )
+    return table if table.schema.equals(schema) else table.cast(schema)
+
+
+def _source_key(csv_path: Path, name: str) -> Dict[bytes, bytes]:
+    """Describe the CSV file and parser settings a cached table was built from."""
+
+    stat = csv_path.stat()
+    options = _convert_options(name)
+    settings = {field: getattr(options, field) for field in _KEYED_CONVERT_OPTIONS}
+    return {
+        b"src_mtime": str(stat.st_mtime_ns).encode(),
+        b"src_size": str(stat.st_size).encode(),
+        b"convert_options": json.dumps(settings, sort_keys=True, default=str).encode(),
+    }
+
+
+def _is_fresh(cached: Path, source_key: Dict[bytes, bytes]) -> bool:
+    """Return True when ``cached`` was written from the current CSV file."""
+
+    if not cached.is_file():
+        return False
+    try:
+        metadata = pq.read_schema(cached).metadata or {}
+    except (OSError, pa.ArrowInvalid):
+        return False
+    return all(metadata.get(key) == value for key, value in source_key.items())
+
+
+def _write_cache(table: pa.Table, cached: Path, source_key: Dict[bytes, bytes]) -> None:
+    """Store ``table`` as Parquet; failures only cost us the cache."""
+
+    metadata = {**(table.schema.metadata or {}), **source_key}
+    partial = cached.with_name(f"{cached.name}.{os.getpid()}.tmp")
+    try:
+        cached.parent.mkdir(parents=True, exist_ok=True)
+        pq.write_table(
+            table.replace_schema_metadata(metadata), partial, compression="snappy"
+        )
+        os.replace(partial, cached)
+    except OSError as exc:
+        partial.unlink(missing_ok=True)
+        print(f"Could not cache {cached}: {exc}")
+
+
+def _convert_options(name: str) -> pcsv.ConvertOptions:
+    return pcsv.ConvertOptions(
+        column_types=_column_types(name),
+        null_values=NULL_VALUES,
+        strings_can_be_null=True,
+        timestamp_parsers=[DATE_FORMAT],
+    )
+
+
+def _read_one(name: str, csv_path: Path, cached: Path) -> pd.DataFrame:
+    """Parse a single CSV file with pyarrow and keep the columns Arrow-backed.
+
+    A Parquet copy is reused while the CSV file's size and modification time
+    are unchanged.
+    """
+
+    source_key = _source_key(csv_path, name)
+    if _is_fresh(cached, source_key):
+        table = _with_column_types(pq.read_table(cached), name)
+    else:
+        table = pcsv.read_csv(csv_path, convert_options=_convert_options(name))
+        _write_cache(table, cached, source_key)
+    return table.to_pandas(types_mapper=pd.ArrowDtype)
+
+
+def _iter_csv_batches(
+    name: str, csv_path: Path, cached: Path, source_key: Dict[bytes, bytes]
+) -> Iterator[pa.RecordBatch]:
+    """Stream ``csv_path`` block by block while writing the Parquet cache."""
+
+    reader = pcsv.open_csv(
+        csv_path,
+        read_options=pcsv.ReadOptions(block_size=STREAM_BLOCK_SIZE),
+        convert_options=_convert_options(name),
+    )
+    partial = cached.with_name(f"{cached.name}.{os.getpid()}.tmp")
+    writer = None
+    try:
+        cached.parent.mkdir(parents=True, exist_ok=True)
+        writer = pq.ParquetWriter(
+            partial, reader.schema.with_metadata(source_key), compression="snappy"
+        )
+    except OSError as exc:
+        print(f"Could not cache {cached}: {exc}")
+
+    complete = False
+    try:
+        for batch in reader:
+            if writer is not None:
+                writer.write_batch(batch)
+            yield batch
+        complete = True
+    finally:
+        if writer is not None:
+            writer.close()
+            if complete:
+                os.replace(partial, cached)
+            else:
+                partial.unlink(missing_ok=True)
+
+
+def _iter_chunks(name: str, csv_path: Path, cached: Path) -> Iterator[pd.DataFrame]:
+    """Yield ``csv_path`` as a sequence of Arrow-backed DataFrames."""
+
+    source_key = _source_key(csv_path, name)
+    if _is_fresh(cached, source_key):
+        batches: Iterator[pa.RecordBatch] = pq.ParquetFile(cached).iter_batches()
+    else:
+        batches = _iter_csv_batches(name, csv_path, cached, source_key)
+    for batch in batches:
+        yield _with_column_types(batch, name).to_pandas(types_mapper=pd.ArrowDtype)
+
+
+def _read_tables(paths: Dict[str, Path], cache_dir: Path) -> Dict[str, pd.DataFrame]:
+    """Read ``paths`` concurrently, keyed by table name."""
+
+    workers = max(1, min(len(paths), os.cpu_count() or 1))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            name: executor.submit(_read_one, name, path, cache_dir / f"{name}.parquet")
+            for name, path in paths.items()
+        }
+        data = {name: future.result() for name, future in futures.items()}
+
+    for path in paths.values():
+        print(f"Read {path}")
+    return data
+
 
 def extract_data(base_path: Path | str = ".") -> Dict[str, pd.DataFrame]:
     """Load every CSV file into a pandas DataFrame.
 
+    The files are parsed concurrently; pyarrow releases the GIL while it
+    tokenizes, so the small lookup files are read while the large order
+    files are still being parsed. Parsed tables are cached as Parquet files
+    under ``base_path / CACHE_DIR`` and reused until the CSV file changes.
+
     Parameters
     ----------
     base_path:
@@ -38,13 +281,40 @@ def extract_data(base_path: Path | str = ".") -> Dict[str, pd.DataFrame]:
         lookup CSV files required by the relational schema.
     """
 
-    data: Dict[str, pd.DataFrame] = {}
     base = Path(base_path)
-    for name, filename in CSV_FILES.items():
-        csv_path = base / filename
-        data[name] = pd.read_csv(csv_path, na_values=["NULL"])
-        print(f"Read {csv_path}")
-    return data
+    paths = {name: base / filename for name, filename in CSV_FILES.items()}
+    return _read_tables(paths, base / CACHE_DIR)
+
+
+def extract_data_streaming(
+    base_path: Path | str = ".",
+) -> Dict[str, pd.DataFrame | Iterator[pd.DataFrame]]:
+    """Like :func:`extract_data`, but stream the large order tables.
+
+    The tables named in ``STREAMING_TABLES`` are returned as lazy iterators of
+    DataFrame chunks so the transform step can process them one block at a
+    time. Every other table is loaded whole, exactly as in ``extract_data``.
+    """
+
+    base = Path(base_path)
+    cache_dir = base / CACHE_DIR
+    paths = {name: base / filename for name, filename in CSV_FILES.items()}
+    lookups = {n: p for n, p in paths.items() if n not in STREAMING_TABLES}
+    data: Dict[str, pd.DataFrame | Iterator[pd.DataFrame]] = {}
+    data.update(_read_tables(lookups, cache_dir))
+    for name, path in paths.items():
+        if name in STREAMING_TABLES:
+            print(f"Streaming {path}")
+            data[name] = _iter_chunks(name, path, cache_dir / f"{name}.parquet")
+    return {name: data[name] for name in CSV_FILES}
 
 
-__all__ = ["extract_data", "CSV_FILES"]
+__all__ = [
+    "extract_data",
+    "extract_data_streaming",
+    "CSV_FILES",
+    "CSV_DTYPES",
+    "CSV_DATES",
+    "CACHE_DIR",
+    "STREAMING_TABLES",
+]
@@ -4,12 +4,12 @@ from __future__ import annotations
 
 import os
 from pathlib import Path
-from typing import Dict, Iterable, Sequence, Tuple
+from typing import Dict, Iterable, List, Sequence, Set, Tuple
 
 import pandas as pd
 import psycopg2
 from psycopg2.extensions import connection as PGConnection
-from psycopg2.extras import execute_values
+from psycopg2.pool import ThreadedConnectionPool
 
 # Only host/port have in-repository defaults. Credentials must be supplied via
 # environment variables so they are not committed to source control.
@@ -65,23 +65,157 @@ def get_database_settings() -> Dict[str, str]:
     return settings
 
 
+class _PreparingConnection(PGConnection):
+    """Connection that remembers which statements it has already prepared."""
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.prepared: Set[str] = set()
+
+
+def _connection_kwargs() -> Dict[str, object]:
+    settings = get_database_settings()
+    return {
+        "connection_factory": _PreparingConnection,
+        "dbname": settings["POSTGRES_DATABASE"],
+        "user": settings["POSTGRES_USER"],
+        "password": settings["POSTGRES_PASSWORD"],
+        "host": settings["POSTGRES_HOST"],
+        "port": settings["POSTGRES_PORT"],
+    }
+
+
 def create_connection() -> PGConnection:
     """Open a psycopg2 connection using the collected settings."""
 
-    settings = get_database_settings()
-    return psycopg2.connect(
-        dbname=settings["POSTGRES_DATABASE"],
-        user=settings["POSTGRES_USER"],
-        password=settings["POSTGRES_PASSWORD"],
-        host=settings["POSTGRES_HOST"],
-        port=settings["POSTGRES_PORT"],
+    return psycopg2.connect(**_connection_kwargs())
+
+
+def create_connection_pool(
+    minconn: int = 1, maxconn: int = 8
+) -> ThreadedConnectionPool:
+    """Create a pool of connections that share the collected settings.
+
+    Connections handed back with ``putconn`` stay open for the next caller, so
+    the connect/authenticate handshake is paid once per pooled connection
+    rather than once per operation.
+    """
+
+    return ThreadedConnectionPool(minconn, maxconn, **_connection_kwargs())
+
+
+def execute_prepared(
+    cursor, name: str, statement: str, params: Sequence[object] = ()
+) -> None:
+    """Run ``statement`` as the server-side prepared statement ``name``.
+
+    ``statement`` uses ``$1``-style placeholders. It is parsed and planned
+    once per connection, on first use; later calls only send ``EXECUTE`` with
+    the parameters. Prepared statements outlive transactions, so a rollback
+    does not undo the ``PREPARE``.
+    """
+
+    prepared = cursor.connection.prepared
+    if name not in prepared:
+        cursor.execute(f"PREPARE {name} AS {statement}")
+        prepared.add(name)
+    if params:
+        placeholders = ", ".join(["%s"] * len(params))
+        cursor.execute(f"EXECUTE {name} ({placeholders})", tuple(params))
+    else:
+        cursor.execute(f"EXECUTE {name}")
+
+
+def _copy_text(value) -> str:
+    """Format one value for PostgreSQL's COPY text format."""
+
+    if value is None or value is pd.NA:
+        return "\\N"
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
     )
 
 
-def load_order_summary(connection: PGConnection, summary: pd.DataFrame) -> None:
-    """Drop and recreate the order_summary table, then insert the rows."""
+class _CopyStream:
+    """Read-only file object that renders ``rows`` in COPY text format.
+
+    Lines are produced only as ``copy_expert`` asks for more data, so a table
+    never has to be held in memory as one large string.
+    """
+
+    def __init__(self, rows: Iterable[Tuple]) -> None:
+        self._rows = iter(rows)
+        self._pending = ""
+        self.row_count = 0
+
+    def _next_line(self) -> str:
+        row = next(self._rows)
+        self.row_count += 1
+        return "\t".join(_copy_text(value) for value in row) + "\n"
+
+    def read(self, size: int = -1) -> str:
+        parts = [self._pending]
+        length = len(self._pending)
+        try:
+            while size < 0 or length < size:
+                line = self._next_line()
+                parts.append(line)
+                length += len(line)
+        except StopIteration:
+            pass
+        data = "".join(parts)
+        if size < 0:
+            self._pending = ""
+            return data
+        self._pending = data[size:]
+        return data[:size]
+
+    def readline(self, size: int = -1) -> str:
+        if self._pending:
+            line, self._pending = self._pending, ""
+            return line
+        try:
+            return self._next_line()
+        except StopIteration:
+            return ""
+
+
+def _copy_rows(
+    cursor,
+    table_name: str,
+    columns: Sequence[str],
+    rows: Iterable[Tuple],
+    freeze: bool = False,
+) -> int:
+    """Bulk load ``rows`` into ``table_name`` with a single COPY statement.
+
+    ``freeze`` writes the rows already frozen. PostgreSQL only allows it
+    when the table was created or truncated earlier in the same transaction.
+    Returns the number of rows sent.
+    """
+
+    stream = _CopyStream(rows)
+    options = " WITH (FREEZE)" if freeze else ""
+    cursor.copy_expert(
+        f"COPY {table_name} (" + ", ".join(columns) + ") FROM STDIN" + options,
+        stream,
+    )
+    return stream.row_count
+
+
+def write_order_summary(cursor, summary: pd.DataFrame) -> None:
+    """Drop and recreate the order_summary table, then insert the rows.
 
-    rows = [
+    Runs on the caller's cursor, inside the caller's transaction.
+    """
+
+    rows = (
         (
             int(row.order_id),
             row.order_date.date(),
@@ -90,31 +224,36 @@ def load_order_summary(connection: PGConnection, summary: pd.DataFrame) -> None:
             float(row.order_total),
         )
         for row in summary.itertuples(index=False)
-    ]
+    )
+
+    cursor.execute(
+        """
+        DROP TABLE IF EXISTS order_summary;
+        CREATE TABLE order_summary (
+            order_id INTEGER PRIMARY KEY,
+            order_date DATE,
+            customer_id INTEGER,
+            customer_name TEXT,
+            order_total NUMERIC
+        );
+        """
+    )
+    count = _copy_rows(
+        cursor,
+        "order_summary",
+        ("order_id", "order_date", "customer_id", "customer_name", "order_total"),
+        rows,
+        freeze=True,
+    )
+    print(f"Saved {count} rows to the order_summary table.")
+
+
+def load_order_summary(connection: PGConnection, summary: pd.DataFrame) -> None:
+    """Drop and recreate the order_summary table, then insert the rows."""
 
     with connection:
         with connection.cursor() as cursor:
-            cursor.execute("DROP TABLE IF EXISTS order_summary;")
-            cursor.execute(
-                """
-                CREATE TABLE order_summary (
-                    order_id INTEGER PRIMARY KEY,
-                    order_date DATE,
-                    customer_id INTEGER,
-                    customer_name TEXT,
-                    order_total NUMERIC
-                );
-                """
-            )
-            cursor.executemany(
-                """
-                INSERT INTO order_summary (
-                    order_id, order_date, customer_id, customer_name, order_total
-                ) VALUES (%s, %s, %s, %s, %s);
-                """,
-                rows,
-            )
-            print(f"Saved {len(rows)} rows to the order_summary table.")
+            write_order_summary(cursor, summary)
 
 
 TABLE_COLUMNS: Dict[str, Sequence[str]] = {
@@ -246,11 +385,13 @@ CREATE_TABLE_STATEMENTS: Sequence[str] = (
         CONSTRAINT fk_products_brand
             FOREIGN KEY (brand_id) REFERENCES brands (brand_id)
             ON UPDATE CASCADE
-            ON DELETE RESTRICT,
+            ON DELETE RESTRICT
+            DEFERRABLE INITIALLY IMMEDIATE,
         CONSTRAINT fk_products_category
             FOREIGN KEY (category_id) REFERENCES categories (category_id)
             ON UPDATE CASCADE
             ON DELETE RESTRICT
+            DEFERRABLE INITIALLY IMMEDIATE
     );
     """,
     """
@@ -268,11 +409,13 @@ CREATE_TABLE_STATEMENTS: Sequence[str] = (
         CONSTRAINT fk_staffs_store
             FOREIGN KEY (store_id) REFERENCES stores (store_id)
             ON UPDATE CASCADE
-            ON DELETE RESTRICT,
+            ON DELETE RESTRICT
+            DEFERRABLE INITIALLY IMMEDIATE,
         CONSTRAINT fk_staffs_manager
             FOREIGN KEY (manager_id) REFERENCES staffs (staff_id)
             ON UPDATE CASCADE
             ON DELETE SET NULL
+            DEFERRABLE INITIALLY IMMEDIATE
     );
     """,
     """
@@ -284,11 +427,13 @@ CREATE_TABLE_STATEMENTS: Sequence[str] = (
         CONSTRAINT fk_stocks_store
             FOREIGN KEY (store_id) REFERENCES stores (store_id)
             ON UPDATE CASCADE
-            ON DELETE CASCADE,
+            ON DELETE CASCADE
+            DEFERRABLE INITIALLY IMMEDIATE,
         CONSTRAINT fk_stocks_product
             FOREIGN KEY (product_id) REFERENCES products (product_id)
             ON UPDATE CASCADE
             ON DELETE RESTRICT
+            DEFERRABLE INITIALLY IMMEDIATE
     );
     """,
     """
@@ -304,15 +449,18 @@ CREATE_TABLE_STATEMENTS: Sequence[str] = (
         CONSTRAINT fk_orders_customer
             FOREIGN KEY (customer_id) REFERENCES customers (customer_id)
             ON UPDATE CASCADE
-            ON DELETE RESTRICT,
+            ON DELETE RESTRICT
+            DEFERRABLE INITIALLY IMMEDIATE,
         CONSTRAINT fk_orders_store
             FOREIGN KEY (store_id) REFERENCES stores (store_id)
             ON UPDATE CASCADE
-            ON DELETE RESTRICT,
+            ON DELETE RESTRICT
+            DEFERRABLE INITIALLY IMMEDIATE,
         CONSTRAINT fk_orders_staff
             FOREIGN KEY (staff_id) REFERENCES staffs (staff_id)
             ON UPDATE CASCADE
             ON DELETE RESTRICT
+            DEFERRABLE INITIALLY IMMEDIATE
     );
     """,
     """
@@ -327,11 +475,13 @@ CREATE_TABLE_STATEMENTS: Sequence[str] = (
         CONSTRAINT fk_order_items_order
             FOREIGN KEY (order_id) REFERENCES orders (order_id)
             ON UPDATE CASCADE
-            ON DELETE CASCADE,
+            ON DELETE CASCADE
+            DEFERRABLE INITIALLY IMMEDIATE,
         CONSTRAINT fk_order_items_product
             FOREIGN KEY (product_id) REFERENCES products (product_id)
             ON UPDATE CASCADE
             ON DELETE RESTRICT
+            DEFERRABLE INITIALLY IMMEDIATE
     );
     """,
 )
@@ -374,13 +524,108 @@ def _coerce_db_value(value):
 
 
 def _ensure_schema(cursor) -> None:
-    """Create the relational schema if it does not already exist."""
+    """Create the relational schema if it does not already exist.
+
+    All statements go to the server as one script, in a single round trip.
+    """
+
+    cursor.execute("".join(CREATE_TABLE_STATEMENTS + CREATE_INDEX_STATEMENTS))
+
 
-    for statement in CREATE_TABLE_STATEMENTS:
-        cursor.execute(statement)
+def _drop_secondary_indexes(cursor) -> List[str]:
+    """Drop the indexes on the core tables that no constraint relies on.
+
+    Returns their definitions so they can be rebuilt after the load. Primary
+    key, unique and other constraint indexes are kept.
+    """
+
+    cursor.execute(
+        """
+        SELECT i.indexrelid::regclass::text, pg_get_indexdef(i.indexrelid)
+        FROM pg_index AS i
+        WHERE i.indrelid = ANY(%s::regclass[])
+          AND NOT EXISTS (
+              SELECT 1 FROM pg_constraint AS c WHERE c.conindid = i.indexrelid
+          )
+        """,
+        (list(LOAD_ORDER),),
+    )
+    indexes = cursor.fetchall()
+    if indexes:
+        cursor.execute("DROP INDEX " + ", ".join(name for name, _ in indexes) + ";")
+    return [definition for _, definition in indexes]
+
+
+def begin_core_load(cursor) -> List[str]:
+    """Create the schema if needed and empty every core table.
+
+    Call :func:`write_table` for each table in ``LOAD_ORDER`` and then
+    :func:`finish_core_load` with the returned index definitions, all in the
+    same transaction.
+    """
+
+    _ensure_schema(cursor)
+    cursor.execute(
+        "TRUNCATE TABLE order_items, orders, stocks, staffs, products, "
+        "customers, stores, categories, brands RESTART IDENTITY CASCADE;"
+    )
+    # Secondary indexes are rebuilt once the data is in; one sorted build per
+    # index is far cheaper than maintaining it row by row during COPY.
+    return _drop_secondary_indexes(cursor)
+
+
+def write_table(cursor, table_name: str, frame: pd.DataFrame) -> None:
+    """Copy ``frame`` into ``table_name`` after :func:`begin_core_load`."""
+
+    # The table is streamed to the server with COPY; the rows are formatted
+    # as the server reads them instead of being collected up front. The
+    # table was truncated earlier in this transaction, so the rows can be
+    # written frozen: no later VACUUM has to rewrite every page to set hint
+    # bits, and with wal_level=minimal the data skips the WAL altogether.
+    columns = TABLE_COLUMNS[table_name]
+    count = _copy_rows(
+        cursor, table_name, columns, _iter_rows(frame, columns), freeze=True
+    )
+    print(f"Loaded {count} rows into {table_name}.")
+
+
+def finish_core_load(cursor, index_definitions: Sequence[str] = ()) -> None:
+    """Fire the deferred key checks, rebuild the indexes, move the sequences on.
+
+    ``index_definitions`` is the list returned by :func:`begin_core_load`.
+    """
+
+    # With the foreign keys deferred, every COPY leaves its checks queued on
+    # the table, and CREATE INDEX refuses a table with pending trigger events.
+    # Firing the checks first also reports a broken reference before the
+    # indexes are built.
+    statements = ["SET CONSTRAINTS ALL IMMEDIATE", *index_definitions]
+    cursor.execute(";\n".join(statements) + ";")
+
+    setvals = []
+    params = []
+    for table_name, column in IDENTITY_TABLES.items():
+        setvals.append(
+            "setval(pg_get_serial_sequence(%s, %s), COALESCE((SELECT MAX("
+            + column
+            + ") FROM "
+            + table_name
+            + "), 0) + 1, false)"
+        )
+        params.extend((f"public.{table_name}", column))
+    cursor.execute("SELECT " + ", ".join(setvals) + ";", params)
+
+
+def write_core_tables(cursor, tables: Dict[str, pd.DataFrame]) -> None:
+    """Truncate and reload all tables needed by the relational schema.
+
+    Runs on the caller's cursor, inside the caller's transaction.
+    """
 
-    for statement in CREATE_INDEX_STATEMENTS:
-        cursor.execute(statement)
+    index_definitions = begin_core_load(cursor)
+    for table_name in LOAD_ORDER:
+        write_table(cursor, table_name, tables[table_name])
+    finish_core_load(cursor, index_definitions)
 
 
 def load_core_tables(connection: PGConnection, tables: Dict[str, pd.DataFrame]) -> None:
@@ -388,40 +633,19 @@ def load_core_tables(connection: PGConnection, tables: Dict[str, pd.DataFrame])
 
     with connection:
         with connection.cursor() as cursor:
-            _ensure_schema(cursor)
-            cursor.execute(
-                "TRUNCATE TABLE order_items, orders, stocks, staffs, products, "
-                "customers, stores, categories, brands RESTART IDENTITY CASCADE;"
-            )
-
-            for table_name in LOAD_ORDER:
-                frame = tables[table_name]
-                columns = TABLE_COLUMNS[table_name]
-                rows = list(_iter_rows(frame, columns))
-                if not rows:
-                    continue
-
-                insert_sql = (
-                    f"INSERT INTO {table_name} (" + ", ".join(columns) + ") VALUES %s"
-                )
-                execute_values(cursor, insert_sql, rows)
-                print(f"Loaded {len(rows)} rows into {table_name}.")
-
-            for table_name, column in IDENTITY_TABLES.items():
-                cursor.execute(
-                    "SELECT setval(pg_get_serial_sequence(%s, %s), "
-                    "COALESCE(MAX("
-                    + column
-                    + "), 0) + 1, false) FROM "
-                    + table_name
-                    + ";",
-                    (f"public.{table_name}", column),
-                )
+            write_core_tables(cursor, tables)
 
 
 __all__ = [
+    "begin_core_load",
     "create_connection",
+    "create_connection_pool",
+    "execute_prepared",
+    "finish_core_load",
     "load_core_tables",
     "load_order_summary",
+    "write_core_tables",
+    "write_order_summary",
+    "write_table",
     "get_database_settings",
 ]
@@ -2,27 +2,189 @@
 
 from __future__ import annotations
 
-from typing import Dict
+from typing import Dict, Iterable, Iterator, List, Mapping, Tuple
 
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
 
+# The order tables may arrive either as one DataFrame or as an iterable of
+# chunks (see ``Extract.extract_data_streaming``).
+RawTable = pd.DataFrame | Iterable[pd.DataFrame]
 
-def prepare_relational_tables(raw: Dict[str, pd.DataFrame]) -> Dict[str, pd.DataFrame]:
-    """Clean and align the raw CSV files with the PostgreSQL schema."""
+# Column types of the prepared tables. Each table is cast with a single
+# ``astype`` call once its columns have been selected. The types are Arrow
+# backed like the extracted columns, so casts between matching widths only
+# touch metadata and nullable columns need no separate extension type.
+_CAST_SCHEMAS: Dict[str, Dict[str, str]] = {
+    "brands": {"brand_id": "int32[pyarrow]"},
+    "categories": {"category_id": "int32[pyarrow]"},
+    "stores": {"store_id": "int32[pyarrow]"},
+    "customers": {"customer_id": "int32[pyarrow]"},
+    "products": {
+        "product_id": "int32[pyarrow]",
+        "brand_id": "int32[pyarrow]",
+        "category_id": "int32[pyarrow]",
+        "model_year": "int16[pyarrow]",
+        "list_price": "double[pyarrow]",
+    },
+    "staffs": {
+        "staff_id": "int32[pyarrow]",
+        "active": "bool[pyarrow]",
+        "store_id": "int32[pyarrow]",
+        "manager_id": "int32[pyarrow]",
+    },
+    "stocks": {
+        "store_id": "int32[pyarrow]",
+        "product_id": "int32[pyarrow]",
+        "quantity": "int32[pyarrow]",
+    },
+    "orders": {
+        "order_id": "int32[pyarrow]",
+        "customer_id": "int32[pyarrow]",
+        "store_id": "int32[pyarrow]",
+        "staff_id": "int32[pyarrow]",
+        "order_status": "int8[pyarrow]",
+        "order_date": "timestamp[s][pyarrow]",
+        "required_date": "timestamp[s][pyarrow]",
+        "shipped_date": "timestamp[s][pyarrow]",
+    },
+    "order_items": {
+        "order_id": "int32[pyarrow]",
+        "item_id": "int32[pyarrow]",
+        "product_id": "int32[pyarrow]",
+        "quantity": "int16[pyarrow]",
+        "list_price": "double[pyarrow]",
+        "discount": "double[pyarrow]",
+    },
+}
+
+
+def _iter_chunks(source: RawTable) -> Iterable[pd.DataFrame]:
+    if isinstance(source, pd.DataFrame):
+        return (source,)
+    return source
+
+
+def _concat_chunks(name: str, frames: List[pd.DataFrame]) -> pd.DataFrame:
+    """Stack the transformed chunks of ``name``; no chunks give an empty table."""
+
+    if not frames:
+        return pd.DataFrame(
+            {
+                column: pd.Series(dtype=dtype)
+                for column, dtype in _CAST_SCHEMAS[name].items()
+            }
+        )
+    return pd.concat(frames, ignore_index=True)
+
+
+def _lookup_ids(values: pd.Series, keys: pd.Series, ids: pd.Series) -> pd.Series:
+    """Replace each of ``values`` with the ID stored next to the matching key.
+
+    The values are matched against ``keys`` in one vectorized pass. A key
+    listed more than once resolves to its last ID, as the ``dict`` lookup
+    this replaced did. Raises ``ValueError`` naming any values that have no
+    matching key.
+    """
+
+    unique = ~keys.duplicated(keep="last").to_numpy()
+    codes = pd.Index(keys.to_numpy()[unique]).get_indexer(values.to_numpy())
+    missing = codes < 0
+    if missing.any():
+        unmapped = ", ".join(sorted(map(str, pd.unique(values[missing]))))
+        raise ValueError(f"No {ids.name} found for {values.name} value(s): {unmapped}")
+    matched = pa.array(ids.to_numpy(dtype=np.int32)[unique][codes])
+    return pd.Series(
+        pd.arrays.ArrowExtensionArray(matched), index=values.index, name=ids.name
+    )
+
+
+def _to_fixed_point(values: pd.Series, scale: int) -> np.ndarray:
+    """Return ``values * scale`` rounded to the nearest int32."""
+
+    scaled = values.to_numpy(dtype=np.float64) * scale
+    return np.rint(scaled, out=scaled).astype(np.int32)
+
+
+def _join_names(first: pd.Series, last: pd.Series) -> pd.Series:
+    """Join two name columns with a space using Arrow's string kernel."""
+
+    joined = pc.binary_join_element_wise(
+        pa.array(first).cast(pa.large_string()),
+        pa.array(last).cast(pa.large_string()),
+        pa.scalar(" ", pa.large_string()),
+    )
+    return pd.Series(pd.arrays.ArrowExtensionArray(joined), index=first.index)
+
+
+def _transform_orders_chunk(
+    chunk: pd.DataFrame, stores: pd.DataFrame, staffs: pd.DataFrame
+) -> pd.DataFrame:
+    """Align one block of raw orders with the ``orders`` table."""
+
+    orders = chunk.assign(
+        store_id=_lookup_ids(chunk["store"], stores["store_name"], stores["store_id"]),
+        staff_id=_lookup_ids(
+            chunk["staff_name"], staffs["first_name"], staffs["staff_id"]
+        ),
+    )
+    return orders[
+        [
+            "order_id",
+            "customer_id",
+            "store_id",
+            "staff_id",
+            "order_status",
+            "order_date",
+            "required_date",
+            "shipped_date",
+        ]
+    ].astype(_CAST_SCHEMAS["orders"])
+
+
+def _transform_order_items_chunk(chunk: pd.DataFrame) -> pd.DataFrame:
+    """Align one block of raw order items with the ``order_items`` table."""
+
+    return chunk[
+        [
+            "order_id",
+            "item_id",
+            "product_id",
+            "quantity",
+            "list_price",
+            "discount",
+        ]
+    ].astype(_CAST_SCHEMAS["order_items"])
+
+
+def iter_relational_tables(
+    raw: Mapping[str, RawTable],
+) -> Iterator[Tuple[str, pd.DataFrame]]:
+    """Yield ``(name, table)`` pairs as each relational table is prepared.
+
+    Tables come out in foreign key order, so a caller can start loading the
+    first ones while the order tables are still being transformed. See
+    :func:`prepare_relational_tables` for the accepted input.
+    """
 
     tables: Dict[str, pd.DataFrame] = {}
 
-    tables["brands"] = raw["brands"][["brand_id", "brand_name"]].copy()
-    tables["brands"]["brand_id"] = tables["brands"]["brand_id"].astype(int)
+    tables["brands"] = raw["brands"][["brand_id", "brand_name"]].astype(
+        _CAST_SCHEMAS["brands"]
+    )
+    yield "brands", tables["brands"]
 
-    tables["categories"] = raw["categories"][["category_id", "category_name"]].copy()
-    tables["categories"]["category_id"] = tables["categories"]["category_id"].astype(
-        int
+    tables["categories"] = raw["categories"][["category_id", "category_name"]].astype(
+        _CAST_SCHEMAS["categories"]
     )
+    yield "categories", tables["categories"]
 
-    stores = raw["stores"].copy()
-    stores = stores.rename(columns={"name": "store_name"})
-    stores.insert(0, "store_id", range(1, len(stores) + 1))
+    # Intermediate frames below are built with rename/assign rather than
+    # copy-then-mutate; copy-on-write shares the untouched columns with ``raw``.
+    stores = raw["stores"].rename(columns={"name": "store_name"})
+    stores = stores.assign(store_id=np.arange(1, len(stores) + 1, dtype=np.int32))
     tables["stores"] = stores[
         [
             "store_id",
@@ -34,15 +196,10 @@ def prepare_relational_tables(raw: Dict[str, pd.DataFrame]) -> Dict[str, pd.Data
             "state",
             "zip_code",
         ]
-    ].copy()
-    tables["stores"]["store_id"] = tables["stores"]["store_id"].astype(int)
+    ].astype(_CAST_SCHEMAS["stores"])
+    yield "stores", tables["stores"]
 
-    store_lookup = dict(
-        zip(tables["stores"]["store_name"], tables["stores"]["store_id"])
-    )
-
-    customers = raw["customers"].copy()
-    tables["customers"] = customers[
+    customers = raw["customers"][
         [
             "customer_id",
             "first_name",
@@ -54,11 +211,15 @@ def prepare_relational_tables(raw: Dict[str, pd.DataFrame]) -> Dict[str, pd.Data
             "state",
             "zip_code",
         ]
-    ].copy()
-    tables["customers"]["customer_id"] = tables["customers"]["customer_id"].astype(int)
+    ].astype(_CAST_SCHEMAS["customers"])
+    # Not part of the customers table itself; the loader only writes the
+    # schema columns. Built once here for the order summary.
+    tables["customers"] = customers.assign(
+        customer_name=_join_names(customers["first_name"], customers["last_name"])
+    )
+    yield "customers", tables["customers"]
 
-    products = raw["products"].copy()
-    tables["products"] = products[
+    tables["products"] = raw["products"][
         [
             "product_id",
             "product_name",
@@ -67,25 +228,19 @@ def prepare_relational_tables(raw: Dict[str, pd.DataFrame]) -> Dict[str, pd.Data
             "model_year",
             "list_price",
         ]
-    ].copy()
-    tables["products"]["product_id"] = tables["products"]["product_id"].astype(int)
-    tables["products"]["brand_id"] = tables["products"]["brand_id"].astype(int)
-    tables["products"]["category_id"] = tables["products"]["category_id"].astype(int)
-    tables["products"]["model_year"] = tables["products"]["model_year"].astype(int)
-    tables["products"]["list_price"] = tables["products"]["list_price"].astype(float)
-
-    staffs = raw["staffs"].copy()
-    staffs = staffs.rename(
-        columns={
-            "name": "first_name",
-            "last_name": "last_name",
-            "store_name": "store_name",
-        }
+    ].astype(_CAST_SCHEMAS["products"])
+    yield "products", tables["products"]
+
+    staffs = raw["staffs"].rename(columns={"name": "first_name"})
+    staffs = staffs.assign(
+        staff_id=np.arange(1, len(staffs) + 1, dtype=np.int32),
+        active=staffs["active"].fillna(0),
+        store_id=_lookup_ids(
+            staffs["store_name"],
+            tables["stores"]["store_name"],
+            tables["stores"]["store_id"],
+        ),
     )
-    staffs.insert(0, "staff_id", range(1, len(staffs) + 1))
-    staffs["manager_id"] = pd.to_numeric(staffs["manager_id"], errors="coerce")
-    staffs["active"] = staffs["active"].fillna(0).astype(int).astype(bool)
-    staffs["store_id"] = staffs["store_name"].map(store_lookup)
     tables["staffs"] = staffs[
         [
             "staff_id",
@@ -98,109 +253,97 @@ def prepare_relational_tables(raw: Dict[str, pd.DataFrame]) -> Dict[str, pd.Data
             "store_id",
             "manager_id",
         ]
-    ].copy()
-    tables["staffs"]["manager_id"] = tables["staffs"]["manager_id"].astype("Int64")
-
-    staff_lookup = dict(
-        zip(tables["staffs"]["first_name"], tables["staffs"]["staff_id"])
-    )
+    ].astype(_CAST_SCHEMAS["staffs"])
+    yield "staffs", tables["staffs"]
 
-    stocks = raw["stocks"].copy()
-    stocks["store_id"] = stocks["store_name"].map(store_lookup)
-    tables["stocks"] = stocks[["store_id", "product_id", "quantity"]].copy()
-    tables["stocks"]["store_id"] = tables["stocks"]["store_id"].astype(int)
-    tables["stocks"]["product_id"] = tables["stocks"]["product_id"].astype(int)
-    tables["stocks"]["quantity"] = tables["stocks"]["quantity"].astype(int)
-
-    orders = raw["orders"].copy()
-    orders["order_date"] = pd.to_datetime(
-        orders["order_date"], format="%d/%m/%Y", errors="coerce"
-    )
-    orders["required_date"] = pd.to_datetime(
-        orders["required_date"], format="%d/%m/%Y", errors="coerce"
+    stocks = raw["stocks"].assign(
+        store_id=_lookup_ids(
+            raw["stocks"]["store_name"],
+            tables["stores"]["store_name"],
+            tables["stores"]["store_id"],
+        )
     )
-    orders["shipped_date"] = pd.to_datetime(
-        orders["shipped_date"], format="%d/%m/%Y", errors="coerce"
+    tables["stocks"] = stocks[["store_id", "product_id", "quantity"]].astype(
+        _CAST_SCHEMAS["stocks"]
     )
-    orders["store_id"] = orders["store"].map(store_lookup)
-    orders["staff_id"] = orders["staff_name"].map(staff_lookup)
-    orders["order_status"] = orders["order_status"].astype(int)
-    orders["order_id"] = orders["order_id"].astype(int)
-    orders["customer_id"] = orders["customer_id"].astype(int)
-    orders["store_id"] = orders["store_id"].astype(int)
-    orders["staff_id"] = orders["staff_id"].astype(int)
-    tables["orders"] = orders[
-        [
-            "order_id",
-            "customer_id",
-            "store_id",
-            "staff_id",
-            "order_status",
-            "order_date",
-            "required_date",
-            "shipped_date",
-        ]
-    ].copy()
+    yield "stocks", tables["stocks"]
 
-    items = raw["order_items"].copy()
-    tables["order_items"] = items[
+    tables["orders"] = _concat_chunks(
+        "orders",
         [
-            "order_id",
-            "item_id",
-            "product_id",
-            "quantity",
-            "list_price",
-            "discount",
-        ]
-    ].copy()
-    tables["order_items"]["order_id"] = tables["order_items"]["order_id"].astype(int)
-    tables["order_items"]["item_id"] = tables["order_items"]["item_id"].astype(int)
-    tables["order_items"]["product_id"] = tables["order_items"]["product_id"].astype(
-        int
+            _transform_orders_chunk(chunk, tables["stores"], tables["staffs"])
+            for chunk in _iter_chunks(raw["orders"])
+        ],
     )
-    tables["order_items"]["quantity"] = tables["order_items"]["quantity"].astype(int)
-    tables["order_items"]["list_price"] = tables["order_items"]["list_price"].astype(
-        float
+    yield "orders", tables["orders"]
+
+    tables["order_items"] = _concat_chunks(
+        "order_items",
+        [
+            _transform_order_items_chunk(chunk)
+            for chunk in _iter_chunks(raw["order_items"])
+        ],
     )
-    tables["order_items"]["discount"] = tables["order_items"]["discount"].astype(float)
+    yield "order_items", tables["order_items"]
+
 
-    return tables
+def prepare_relational_tables(raw: Mapping[str, RawTable]) -> Dict[str, pd.DataFrame]:
+    """Clean and align the raw CSV files with the PostgreSQL schema.
+
+    ``raw["orders"]`` and ``raw["order_items"]`` may be iterables of chunks;
+    each chunk is transformed on its own and the results are concatenated.
+    """
+
+    return dict(iter_relational_tables(raw))
 
 
 def build_order_summary(tables: Dict[str, pd.DataFrame]) -> pd.DataFrame:
     """Create a summary table ready for loading into PostgreSQL."""
 
-    orders = tables["orders"].copy()
-    items = tables["order_items"].copy()
-    customers = tables["customers"].copy()
+    orders = tables["orders"]
+    items = tables["order_items"]
+    customers = tables["customers"]
 
-    # Work out how much each order is worth.
-    items["line_total"] = (
-        items["quantity"].astype(float)
-        * items["list_price"].astype(float)
-        * (1 - items["discount"].astype(float))
-    )
+    # Work out how much each order is worth: quantity * price * (1 - discount).
+    # Prices have two decimals and discounts at most four, so the maths is done
+    # in fixed point on int32 inputs: cents * (10000 - basis points) is exact
+    # in millionths of the currency unit and is only turned back into a float
+    # once per order. Every step writes into the same output buffer.
+    quantity = items["quantity"].to_numpy()
+    price_cents = _to_fixed_point(items["list_price"], 100)
+    discount_bp = _to_fixed_point(items["discount"], 10_000)
+    line_total = np.subtract(10_000, discount_bp, dtype=np.int64)
+    np.multiply(line_total, price_cents, out=line_total)
+    np.multiply(line_total, quantity, out=line_total)
+    # The totals are only joined on order_id, so the group keys are not sorted.
     totals = (
-        items.groupby("order_id", as_index=False)["line_total"]
+        pd.Series(line_total)
+        .groupby(items["order_id"].to_numpy(), sort=False)
         .sum()
-        .rename({"line_total": "order_total"}, axis=1)
+        .div(1_000_000)
+        .rename("order_total")
     )
 
-    # Add the customer names to the orders table.
-    customers["customer_name"] = customers["first_name"] + " " + customers["last_name"]
-    customer_details = customers[["customer_id", "customer_name"]]
+    # Customer names keyed by customer_id. Both lookups below probe the
+    # existing index of the right-hand Series once per order; unlike a merge or
+    # join they add a single column and leave the order columns untouched.
+    customer_names = customers["customer_name"].set_axis(customers["customer_id"])
 
-    summary = (
-        orders.merge(totals, on="order_id", how="left")
-        .merge(customer_details, on="customer_id", how="left")
-        .fillna({"order_total": 0})
+    # Orders without items get a total of 0; the fill happens during the
+    # lookup, so there is no separate fillna/astype pass over the column.
+    order_total = totals.reindex(orders["order_id"].to_numpy(), fill_value=0.0)
+    summary = orders[["order_id", "order_date", "customer_id"]].assign(
+        customer_name=orders["customer_id"].map(customer_names),
+        order_total=order_total.to_numpy(),
     )
 
-    summary["order_total"] = summary["order_total"].astype(float)
-
     return summary[
         ["order_id", "order_date", "customer_id", "customer_name", "order_total"]
     ]
 
 
-__all__ = ["build_order_summary", "prepare_relational_tables"]
+__all__ = [
+    "build_order_summary",
+    "iter_relational_tables",
+    "prepare_relational_tables",
+]
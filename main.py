@@ -2,14 +2,45 @@
 
 from __future__ import annotations
 
-from typing import Callable, Dict, Iterable, List, Sequence, Set, Tuple
+import argparse
+import atexit
+import functools
+import hashlib
+import hmac
+import os
+import queue
+import sys
+import threading
+from itertools import chain, groupby
+from operator import itemgetter
+from typing import (
+    Callable,
+    Dict,
+    FrozenSet,
+    Iterable,
+    Iterator,
+    List,
+    Sequence,
+    Tuple,
+    TypeVar,
+)
+
+import pandas as pd
 import psycopg2
 from psycopg2 import sql
 from psycopg2.extensions import connection as PGConnection
+from psycopg2.pool import ThreadedConnectionPool
 
-from Extract import extract_data
-from Transform import build_order_summary, prepare_relational_tables
-from Load import create_connection, load_core_tables, load_order_summary
+from Extract import extract_data_streaming
+from Transform import build_order_summary, iter_relational_tables
+from Load import (
+    begin_core_load,
+    create_connection_pool,
+    execute_prepared,
+    finish_core_load,
+    write_order_summary,
+    write_table,
+)
 
 
 # CLI permissions are a simplified view of what each database role can do in the
@@ -17,23 +48,82 @@ from Load import create_connection, load_core_tables, load_order_summary
 StoreContext = Tuple[int, str]
 
 
-ROLE_PERMISSIONS: Dict[str, Set[str]] = {
-    "admin": {"load_data", "create", "read", "update", "delete"},
-    "customer": {"read"},
-    "warehouse": {"read", "update"},
-    "analytics": {"read"},
-    "store": {"read"},
-    "hr": {"read"},
+ROLE_PERMISSIONS: Dict[str, FrozenSet[str]] = {
+    "admin": frozenset({"load_data", "create", "read", "update", "delete"}),
+    "customer": frozenset({"read"}),
+    "warehouse": frozenset({"read", "update"}),
+    "analytics": frozenset({"read"}),
+    "store": frozenset({"read"}),
+    "hr": frozenset({"read"}),
 }
 
-ROLE_CREDENTIALS: Dict[str, str] = {
-    "admin": "admin123",
-    "customer": "customer123",
-    "warehouse": "warehouse123",
-    "analytics": "analytics123",
-    "store": "store123",
-    "hr": "hr123",
+# Menu choices per role, "exit" included: a set for membership tests and a
+# sorted tuple for display.
+_ALLOWED_SET: Dict[str, FrozenSet[str]] = {
+    role: permissions | {"exit"} for role, permissions in ROLE_PERMISSIONS.items()
 }
+_ALLOWED_ACTIONS: Dict[str, Tuple[str, ...]] = {
+    role: tuple(sorted(actions)) for role, actions in _ALLOWED_SET.items()
+}
+_VALID_ROLES_STR = ", ".join(sorted(ROLE_PERMISSIONS))
+
+# Logins are checked against salted scrypt hashes of the role passwords; the
+# plaintext passwords are not kept in the source. A role's entry is
+# ``(salt, _derive_key(_password_digest(password), salt))`` for a random
+# 16-byte salt.
+_ROLE_HASHES: Dict[str, Tuple[bytes, bytes]] = {
+    "admin": (
+        bytes.fromhex("5a288f248684d91861c9f283df26a104"),
+        bytes.fromhex(
+            "33f5367756bdac35f1d7b849619e8d53924dd5ac58256a339be7903d33f3ea32"
+            "f6c2297de706d261fd99fdb1378e87f13b53bc207ecbcdf3b568d81065a760c7"
+        ),
+    ),
+    "customer": (
+        bytes.fromhex("58369e606d6e7a94310628a7c6339800"),
+        bytes.fromhex(
+            "3b3ef37b6e6c676f450cf4d19a35e466f21594defa4de5e7ccfc6599d202005d"
+            "bf25997d7afad0db4a783b7a0ab40e2a9af4b28132d0475f0e3cc8bd4aadca60"
+        ),
+    ),
+    "warehouse": (
+        bytes.fromhex("fe464e620a0ddf929064d8f785a28629"),
+        bytes.fromhex(
+            "1cabfefee8e4db4620c4f549a682d6ca3188e53c5632757578b9e75561f7f55a"
+            "5075deb5ce927acca8d8b87aff37ac6135cb7fb7195b2f84943483ced87f88dc"
+        ),
+    ),
+    "analytics": (
+        bytes.fromhex("2fce37e10f18860d80d30b34bd5bb56b"),
+        bytes.fromhex(
+            "fab13f6f9af56a69f9a86737bdd949d41592ec9908e556c345c47bfd12e49bac"
+            "4fbfac6077219f6af5ff15895282697cbfa508860d13f035069102e808dc0813"
+        ),
+    ),
+    "store": (
+        bytes.fromhex("05ab69bc4dbefb93b03780d9cc8dc067"),
+        bytes.fromhex(
+            "afc3b71894c14ade711cdaf955e6822e4d74b69b2b44329ad20ad8991b8147d4"
+            "0c35f3d28c0e49879e032991b4aeb4470b5cf03bb041e32889ca416e6bee45e6"
+        ),
+    ),
+    "hr": (
+        bytes.fromhex("84335b9caf931fe54f8f100a61d82c84"),
+        bytes.fromhex(
+            "162cf0ca05cec753f020cf28b1e339e75dc93dd0f48d050d96dc15c3afd57c26"
+            "4775390ab009a65ab8ee8f13d294a0b7b87f08db063f1e7a81ed775c417a74ec"
+        ),
+    ),
+}
+
+
+def _password_digest(password: str) -> bytes:
+    return hashlib.blake2b(password.encode(), digest_size=32).digest()
+
+
+def _derive_key(digest: bytes, salt: bytes) -> bytes:
+    return hashlib.scrypt(digest, salt=salt, n=2**14, r=8, p=1)
+
 
 ROLE_DATA_ACCESS: Dict[str, Sequence[str]] = {
     "admin": ("All tables",),
@@ -78,6 +168,17 @@ ACTION_DESCRIPTIONS: Dict[str, str] = {
     "exit": "Exit the program.",
 }
 
+# The action menu and the invalid-choice message for each role, formatted once.
+_MENU_TEXT: Dict[str, str] = {
+    role: "\nWhat would you like to do?\n"
+    + "\n".join(f" - {name}: {ACTION_DESCRIPTIONS.get(name, '')}" for name in actions)
+    for role, actions in _ALLOWED_ACTIONS.items()
+}
+_MENU_ERR: Dict[str, str] = {
+    role: "Invalid action. Please choose one of: " + ", ".join(actions)
+    for role, actions in _ALLOWED_ACTIONS.items()
+}
+
 CUSTOMER_FIELDS: List[str] = [
     "customer_id",
     "first_name",
@@ -90,14 +191,36 @@ CUSTOMER_FIELDS: List[str] = [
     "zip_code",
 ]
 
+# Prepared tables that may wait for the loader before the ETL worker pauses.
+PREPARE_QUEUE_SIZE = 4
+
+# Rows fetched per round trip when listing customers.
+LISTING_PAGE_SIZE = 1000
+
+# Prompt labels for CUSTOMER_FIELDS, e.g. "Zip Code" for zip_code.
+_FIELD_LABELS: Tuple[str, ...] = tuple(
+    field.replace("_", " ").title() for field in CUSTOMER_FIELDS
+)
+_TEXT_FIELD_PROMPTS: Tuple[str, ...] = tuple(
+    f"{label}: " for label in _FIELD_LABELS[1:]
+)
+
+# Parameters are positional, in CUSTOMER_FIELDS order.
+_CREATE_SQL = (
+    "INSERT INTO customers ("
+    + ", ".join(CUSTOMER_FIELDS)
+    + ") VALUES ("
+    + ", ".join(f"${position}" for position in range(1, len(CUSTOMER_FIELDS) + 1))
+    + ")"
+)
+
 
 def run_pipeline() -> None:
     """Prompt for a role and allow role-specific operations."""
 
     print("Welcome to the ETL and customer management tool.")
     role = _login()
-    permissions = ROLE_PERMISSIONS[role]
-    allowed_actions = ", ".join(sorted(permissions | {"exit"}))
+    allowed_actions = ", ".join(_ALLOWED_ACTIONS[role])
     print(f"Logged in as '{role}'. Available actions: {allowed_actions}.")
 
     accessible_data = ROLE_DATA_ACCESS.get(role, ())
@@ -115,34 +238,26 @@ def run_pipeline() -> None:
         store_id, store_name = store_context
         print(f"Connected to store '{store_name}' (ID {store_id}).")
 
-    action_handlers: Dict[str, Callable[[], None]] = {
-        "load_data": _handle_load_data,
-        "create": lambda: _with_connection(_handle_create_customer),
-        "read": lambda: _with_connection(
-            lambda connection: _handle_read_customer(
-                connection, role, store_context
-            )
-        ),
-        "update": lambda: _with_connection(_handle_update_customer),
-        "delete": lambda: _with_connection(_handle_delete_customer),
-    }
-
     while True:
-        action = _prompt_for_action(permissions)
+        action = _prompt_for_action(role)
         if action == "exit":
             print("Goodbye!")
             return
-        handler = action_handlers[action]
-        handler()
+        handler = _ACTION_DISPATCH[action]
+        if action == "load_data":
+            handler()
+        elif action == "read":
+            _with_connection(handler, role, store_context)
+        else:
+            _with_connection(handler)
 
 
 def _login() -> str:
     attempts_remaining = 3
-    valid_roles = ", ".join(sorted(ROLE_PERMISSIONS))
     while attempts_remaining:
-        role = input(f"Enter your role ({valid_roles}): ").strip().lower()
+        role = input(f"Enter your role ({_VALID_ROLES_STR}): ").strip().lower()
         password = _prompt_for_password("Enter password: ")
-        if role in ROLE_CREDENTIALS and ROLE_CREDENTIALS[role] == password:
+        if _check_credentials(role, _password_digest(password)):
             return role
         attempts_remaining -= 1
         if attempts_remaining == 0:
@@ -153,21 +268,45 @@ def _login() -> str:
         )
 
 
+@functools.lru_cache(maxsize=64)
+def _check_credentials(role: str, password_digest: bytes) -> bool:
+    """Verify a login; repeat attempts in the same process skip the KDF.
+
+    The cache is keyed on a BLAKE2b digest so no plaintext password is kept.
+    """
+
+    stored = _ROLE_HASHES.get(role)
+    if stored is None:
+        return False
+    salt, expected = stored
+    return hmac.compare_digest(_derive_key(password_digest, salt), expected)
+
+
+def _parse_int(text: str) -> int | None:
+    """Return ``text`` as an int, or None if it is not a whole number.
+
+    Checks the characters first so bad input does not go through a raised
+    and caught ValueError.
+    """
+
+    digits = text[1:] if text.startswith("-") else text
+    if not digits.isdecimal():
+        return None
+    return int(text)
+
+
 def _prompt_for_password(prompt: str) -> str:
     return input(prompt)
 
-def _prompt_for_action(permissions: Set[str]) -> str:
-    allowed_actions = sorted(permissions | {"exit"})
-    print("\nWhat would you like to do?")
-    for name in allowed_actions:
-        description = ACTION_DESCRIPTIONS.get(name, "")
-        print(f" - {name}: {description}")
+def _prompt_for_action(role: str) -> str:
+    allowed_set = _ALLOWED_SET[role]
+    print(_MENU_TEXT[role])
 
     while True:
         action = input("Select an action: ").strip().lower()
-        if action in allowed_actions:
+        if action in allowed_set:
             return action
-        print("Invalid action. Please choose one of:", ", ".join(allowed_actions))
+        print(_MENU_ERR[role])
 
 
 def _handle_load_data() -> None:
@@ -180,67 +319,183 @@ def _handle_load_data() -> None:
         print("Skipping data load.")
         return
 
+    _run_etl()
+
+
+def _run_etl() -> bool:
+    """Run extract, transform and load; return True if the load committed."""
+
+    if not _with_connection(_load_all):
+        return False
+    print("All done! You can now explore the order_summary table in PostgreSQL.")
+    return True
+
+
+def _iter_prepared_tables() -> Iterator[Tuple[str, pd.DataFrame]]:
+    """Extract and transform, yielding each table and then the order summary."""
+
     print("Step 1: Extracting the CSV files")
-    data = extract_data()
+    data = extract_data_streaming()
 
     print("Step 2: Preparing relational tables and the order summary")
-    tables = prepare_relational_tables(data)
-    summary = build_order_summary(tables)
+    tables: Dict[str, pd.DataFrame] = {}
+    for name, table in iter_relational_tables(data):
+        tables[name] = table
+        yield name, table
+    yield "order_summary", build_order_summary(tables)
 
-    print("Step 3: Saving everything to PostgreSQL...")
-    _with_connection(lambda connection: _load_all(connection, tables, summary))
-    print("All done! You can now explore the order_summary table in PostgreSQL.")
 
+def _prepare_in_background() -> Iterator[Tuple[str, pd.DataFrame]]:
+    """Run :func:`_iter_prepared_tables` on a worker thread.
+
+    Tables are handed over through a bounded queue as they are finished, so
+    the caller can copy one table into PostgreSQL while the next is being
+    prepared. Errors on the worker are re-raised in the caller. The worker
+    starts with the first ``next()``; closing the returned iterator stops it
+    and waits for it to exit.
+    """
 
-def _load_all(connection: PGConnection, tables, summary) -> None:
-    load_core_tables(connection, tables)
-    load_order_summary(connection, summary)
+    ready: queue.Queue = queue.Queue(maxsize=PREPARE_QUEUE_SIZE)
+    stop = threading.Event()
 
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                ready.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
 
-def _with_connection(func: Callable[[PGConnection], None]) -> None:
+    def produce() -> None:
+        try:
+            for item in _iter_prepared_tables():
+                if not put(item):
+                    return
+        except BaseException as exc:
+            put(exc)
+        else:
+            put(None)
+
+    def consume() -> Iterator[Tuple[str, pd.DataFrame]]:
+        worker = threading.Thread(target=produce, name="etl-prepare", daemon=True)
+        worker.start()
+        try:
+            while (item := ready.get()) is not None:
+                if isinstance(item, BaseException):
+                    raise item
+                yield item
+        finally:
+            # A worker blocked on the full queue notices the event within one
+            # put() timeout; one busy preparing a table exits after that step.
+            stop.set()
+            worker.join()
+
+    return consume()
+
+
+def _load_all(connection: PGConnection) -> bool:
+    # Preparing the data overlaps with loading it: while one table is copied
+    # in, the worker thread prepares the next.
+    prepared = _prepare_in_background()
     try:
-        connection = create_connection()
-    except psycopg2.Error as exc:  # pragma: no cover - defensive
+        # Nothing touches the database until the first table is ready, so the
+        # core tables are only locked (and empty) while the data is loading,
+        # not while the CSV files are parsed.
+        first = next(prepared)
+        print("Step 3: Saving everything to PostgreSQL...")
+
+        # The core tables and the summary are written in one transaction, so
+        # the whole load commits once and a failure leaves the previous data
+        # intact. Foreign keys are declared DEFERRABLE, so they are checked
+        # once every table is in (finish_core_load fires them) rather than
+        # while each table is copied, and the commit itself does not wait for
+        # the WAL flush (a crash can only lose the load, which is simply
+        # rerun).
+        with connection:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SET CONSTRAINTS ALL DEFERRED; SET LOCAL synchronous_commit = off"
+                )
+                index_definitions = begin_core_load(cursor)
+                for name, table in chain((first,), prepared):
+                    if name == "order_summary":
+                        write_order_summary(cursor, table)
+                    else:
+                        write_table(cursor, name, table)
+                finish_core_load(cursor, index_definitions)
+    except psycopg2.Error as exc:
+        print(f"Failed to load data: {exc}")
+        return False
+    finally:
+        # Stops the worker right away if the load failed part-way.
+        prepared.close()
+    return True
+
+
+_POOL: ThreadedConnectionPool | None = None
+
+
+def _get_pool() -> ThreadedConnectionPool:
+    """Return the shared connection pool, opening it on first use."""
+
+    global _POOL
+    if _POOL is None:
+        _POOL = create_connection_pool()
+        atexit.register(_POOL.closeall)
+    return _POOL
+
+
+_T = TypeVar("_T")
+
+
+def _with_connection(func: Callable[..., _T], *args) -> _T | bool:
+    """Call ``func(connection, *args)`` with a connection from the pool.
+
+    Returns what ``func`` returns, or False if no connection could be opened.
+    """
+
+    # Handlers commit or roll back themselves and never close the connection;
+    # it goes back to the pool (which rolls back anything left open) for the
+    # next action.
+    try:
+        pool = _get_pool()
+        connection = pool.getconn()
+    except (psycopg2.Error, RuntimeError) as exc:
+        # RuntimeError: the database settings are missing (see Load).
         print(f"Could not connect to the database: {exc}")
-        return
+        return False
 
     try:
-        func(connection)
+        return func(connection, *args)
     finally:
-        connection.close()
+        pool.putconn(connection)
 
 
 def _handle_create_customer(connection: PGConnection) -> None:
     print("Creating a new customer. Leave a field blank to cancel.")
-    values = {}
-    for field in CUSTOMER_FIELDS:
-        value = input(f"{field.replace('_', ' ').title()}: ").strip()
+    # customer_id is the only numeric field and comes first, so it is read on
+    # its own and the loop only handles the text fields.
+    value = input(f"{_FIELD_LABELS[0]}: ").strip()
+    if not value:
+        print("Creation cancelled.")
+        return
+    customer_id = _parse_int(value)
+    if customer_id is None:
+        print("Customer ID must be an integer. Creation cancelled.")
+        return
+    values: List[str | int] = [customer_id]
+    for prompt in _TEXT_FIELD_PROMPTS:
+        value = input(prompt).strip()
         if not value:
             print("Creation cancelled.")
             return
-        if field == "customer_id":
-            try:
-                values[field] = int(value)
-            except ValueError:
-                print("Customer ID must be an integer. Creation cancelled.")
-                return
-        else:
-            values[field] = value
+        values.append(value)
 
     try:
         with connection:
             with connection.cursor() as cursor:
-                cursor.execute(
-                    """
-                    INSERT INTO customers (
-                        customer_id, first_name, last_name, email, phone,
-                        street, city, state, zip_code
-                    ) VALUES (%(customer_id)s, %(first_name)s, %(last_name)s,
-                        %(email)s, %(phone)s, %(street)s, %(city)s,
-                        %(state)s, %(zip_code)s)
-                    """,
-                    values,
-                )
+                execute_prepared(cursor, "stmt_create_customer", _CREATE_SQL, values)
         print("Customer created successfully.")
     except psycopg2.Error as exc:
         print(f"Failed to create customer: {exc}")
@@ -264,33 +519,62 @@ def _handle_read_customer(
     identifier = input(
         "Enter a customer ID to look up or press enter to list all customers: "
     ).strip()
-    query = "SELECT customer_id, first_name, last_name, email FROM customers"
-    params: Iterable[str | int] = ()
+    customer_id = None
     if identifier:
-        try:
-            customer_id = int(identifier)
-        except ValueError:
+        customer_id = _parse_int(identifier)
+        if customer_id is None:
             print("Customer ID must be an integer.")
             return
-        query += " WHERE customer_id = %s"
-        params = (customer_id,)
+    _list_customers(connection, customer_id)
+
+
+def _format_customer_rows(rows: Iterable[Tuple[int, str, str, str]]) -> str:
+    return "".join(
+        f" - {cust_id}: {first} {last} <{email}>\n"
+        for cust_id, first, last, email in rows
+    )
 
+
+def _list_customers(connection: PGConnection, customer_id: int | None) -> bool:
+    """Print one customer, or every customer when ``customer_id`` is None.
+
+    Returns False if the query failed or the requested customer does not exist.
+    """
+
+    query = "SELECT customer_id, first_name, last_name, email FROM customers"
+    write = sys.stdout.write
+    found = False
     try:
-        with connection.cursor() as cursor:
-            cursor.execute(query, params)
-            rows = cursor.fetchall()
+        with connection:
+            if customer_id is not None:
+                # A single row needs no server-side cursor.
+                with connection.cursor() as cursor:
+                    cursor.execute(query + " WHERE customer_id = %s", (customer_id,))
+                    row = cursor.fetchone()
+                if row is not None:
+                    write("Customer records:\n")
+                    write(_format_customer_rows((row,)))
+                    found = True
+            else:
+                # A named (server-side) cursor streams the listing one page of
+                # LISTING_PAGE_SIZE rows at a time, so memory stays flat
+                # however many customers exist.
+                with connection.cursor(name="customer_listing") as cursor:
+                    cursor.execute(query)
+                    while rows := cursor.fetchmany(LISTING_PAGE_SIZE):
+                        if not found:
+                            write("Customer records:\n")
+                            found = True
+                        # One write per page rather than one per customer.
+                        write(_format_customer_rows(rows))
     except psycopg2.Error as exc:
         print(f"Failed to read customer data: {exc}")
-        return
+        return False
 
-    if not rows:
+    if not found:
         print("No customer records found.")
-        return
-
-    print("Customer records:")
-    for row in rows:
-        cust_id, first, last, email = row
-        print(f" - {cust_id}: {first} {last} <{email}>")
+        return customer_id is None
+    return True
 
 
 def _handle_customer_self_service(connection: PGConnection) -> None:
@@ -299,55 +583,68 @@ def _handle_customer_self_service(connection: PGConnection) -> None:
         print("A customer ID is required to view data.")
         return
 
-    try:
-        customer_id = int(identifier)
-    except ValueError:
+    customer_id = _parse_int(identifier)
+    if customer_id is None:
         print("Customer ID must be an integer.")
         return
+    _show_customer_data(connection, customer_id)
+
 
+def _show_customer_data(connection: PGConnection, customer_id: int) -> bool:
+    # One round trip: the profile, orders and order items come back as three
+    # JSON arrays from a single statement. Numeric values are sent as text so
+    # they print exactly as stored.
     try:
         with connection.cursor() as cursor:
-            cursor.execute(
+            execute_prepared(
+                cursor,
+                "stmt_customer_self_service",
                 """
-                SELECT customer_id, first_name, last_name, email, phone,
-                       street, city, state, zip_code
-                FROM customers
-                WHERE customer_id = %s
-                """,
-                (customer_id,),
-            )
-            customer = cursor.fetchone()
-            if customer is None:
-                print("No data found for that customer ID.")
-                return
-
-            cursor.execute(
-                """
-                SELECT order_id, order_status, order_date, required_date, shipped_date
-                FROM orders
-                WHERE customer_id = %s
-                ORDER BY order_date
-                """,
-                (customer_id,),
-            )
-            orders = cursor.fetchall()
-
-            cursor.execute(
-                """
-                SELECT oi.order_id, oi.item_id, p.product_name, oi.quantity,
-                       oi.list_price, oi.discount
-                FROM order_items AS oi
-                JOIN orders AS o ON o.order_id = oi.order_id
-                JOIN products AS p ON p.product_id = oi.product_id
-                WHERE o.customer_id = %s
-                ORDER BY oi.order_id, oi.item_id
+                WITH c AS (
+                    SELECT customer_id, first_name, last_name, email, phone,
+                           street, city, state, zip_code
+                    FROM customers
+                    WHERE customer_id = $1
+                ),
+                o AS (
+                    SELECT order_id, order_status, order_date, required_date,
+                           shipped_date
+                    FROM orders
+                    WHERE customer_id = $1
+                ),
+                i AS (
+                    SELECT oi.order_id, oi.item_id, p.product_name, oi.quantity,
+                           oi.list_price, oi.discount
+                    FROM order_items AS oi
+                    JOIN o ON o.order_id = oi.order_id
+                    JOIN products AS p ON p.product_id = oi.product_id
+                )
+                SELECT
+                    (SELECT json_build_array(customer_id, first_name, last_name,
+                                             email, phone, street, city, state,
+                                             zip_code)
+                     FROM c),
+                    (SELECT COALESCE(json_agg(json_build_array(
+                                order_id, order_status, order_date,
+                                required_date, shipped_date)
+                            ORDER BY order_date), '[]')
+                     FROM o),
+                    (SELECT COALESCE(json_agg(json_build_array(
+                                order_id, item_id, product_name, quantity,
+                                list_price::text, discount::text)
+                            ORDER BY order_id, item_id), '[]')
+                     FROM i)
                 """,
                 (customer_id,),
             )
-            order_items = cursor.fetchall()
+            customer, orders, order_items = cursor.fetchone()
     except psycopg2.Error as exc:
         print(f"Failed to read customer data: {exc}")
-        return
+        return False
+
+    if customer is None:
+        print("No data found for that customer ID.")
+        return False
 
     print("\nCustomer profile:")
     (
@@ -370,12 +667,13 @@ def _handle_customer_self_service(connection: PGConnection) -> None:
 
     if not orders:
         print("\nNo orders found for this customer.")
-        return
+        return True
 
-    items_by_order: Dict[int, List[tuple]] = {}
-    for item in order_items:
-        order_id = item[0]
-        items_by_order.setdefault(order_id, []).append(item)
+    # The items arrive sorted by order_id, so each order's items are adjacent.
+    items_by_order: Dict[int, List[tuple]] = {
+        order_id: list(items)
+        for order_id, items in groupby(order_items, key=itemgetter(0))
+    }
 
     print("\nOrders:")
     for order in orders:
@@ -394,17 +692,14 @@ def _handle_customer_self_service(connection: PGConnection) -> None:
                 f"#{item_id} {product_name} - qty {quantity}, price {list_price},"
                 f" discount {discount}"
             )
+    return True
 
 
-def _prompt_for_store_selection() -> StoreContext | None:
-    try:
-        connection = create_connection()
-    except psycopg2.Error as exc:
-        print(f"Could not connect to the database to fetch stores: {exc}")
-        return None
+def _fetch_stores(connection: PGConnection) -> List[Tuple[int, str, str, str]]:
+    """Return every store, or an empty list (after saying why) if there is none."""
 
     try:
-        with connection.cursor() as cursor:
+        with connection, connection.cursor() as cursor:
             cursor.execute(
                 """
                 SELECT store_id, store_name, city, state
@@ -415,12 +710,16 @@ def _prompt_for_store_selection() -> StoreContext | None:
             stores = cursor.fetchall()
     except psycopg2.Error as exc:
         print(f"Failed to load store list: {exc}")
-        return None
-    finally:
-        connection.close()
+        return []
 
     if not stores:
         print("No stores available to connect to.")
+    return stores
+
+
+def _prompt_for_store_selection() -> StoreContext | None:
+    stores = _with_connection(_fetch_stores)
+    if not stores:
         return None
 
     print("\nAvailable stores:")
@@ -430,9 +729,8 @@ def _prompt_for_store_selection() -> StoreContext | None:
 
     while True:
         selection = input("Enter the ID of the store to connect as: ").strip()
-        try:
-            store_id = int(selection)
-        except ValueError:
+        store_id = _parse_int(selection)
+        if store_id is None:
             print("Store ID must be a number.")
             continue
 
@@ -455,9 +753,8 @@ def _handle_store_portal(connection: PGConnection, store_context: StoreContext)
         _list_store_orders(connection, store_id)
         return
 
-    try:
-        customer_id = int(identifier)
-    except ValueError:
+    customer_id = _parse_int(identifier)
+    if customer_id is None:
         print("Customer ID must be an integer.")
         return
 
@@ -557,9 +854,10 @@ def _show_store_customer_orders(
         "\nOrders at this store:"
     )
 
-    items_by_order: Dict[int, List[tuple]] = {}
-    for item in order_items:
-        items_by_order.setdefault(item[0], []).append(item)
+    items_by_order: Dict[int, List[tuple]] = {
+        order_id: list(items)
+        for order_id, items in groupby(order_items, key=itemgetter(0))
+    }
 
     for order in orders:
         order_id, status, order_date, required_date, shipped_date = order
@@ -584,9 +882,8 @@ def _handle_update_customer(connection: PGConnection) -> None:
     if not customer_id_input:
         print("Update cancelled.")
         return
-    try:
-        customer_id = int(customer_id_input)
-    except ValueError:
+    customer_id = _parse_int(customer_id_input)
+    if customer_id is None:
         print("Customer ID must be an integer. Update cancelled.")
         return
 
@@ -605,21 +902,33 @@ def _handle_update_customer(connection: PGConnection) -> None:
         print("No value provided. Update cancelled.")
         return
 
+    _update_customer(connection, customer_id, field_name, new_value)
+
+
+def _update_customer(
+    connection: PGConnection, customer_id: int, field_name: str, new_value: str
+) -> bool:
     try:
         with connection:
             with connection.cursor() as cursor:
-                cursor.execute(
-                    sql.SQL("UPDATE customers SET {field} = %s WHERE customer_id = %s").format(
-                        field=sql.Identifier(field_name)
-                    ),
+                # One prepared statement per column; the column name cannot
+                # be a parameter.
+                execute_prepared(
+                    cursor,
+                    f"stmt_update_customer_{field_name}",
+                    sql.SQL("UPDATE customers SET {field} = $1 WHERE customer_id = $2")
+                    .format(field=sql.Identifier(field_name))
+                    .as_string(connection),
                     (new_value, customer_id),
                 )
                 if cursor.rowcount == 0:
                     print("Customer not found.")
-                    return
+                    return False
         print("Customer updated successfully.")
+        return True
     except psycopg2.Error as exc:
         print(f"Failed to update customer: {exc}")
+        return False
 
 
 def _handle_delete_customer(connection: PGConnection) -> None:
@@ -628,9 +937,8 @@ def _handle_delete_customer(connection: PGConnection) -> None:
         print("Delete cancelled.")
         return
 
-    try:
-        customer_id = int(customer_id_input)
-    except ValueError:
+    customer_id = _parse_int(customer_id_input)
+    if customer_id is None:
         print("Customer ID must be an integer. Delete cancelled.")
         return
 
@@ -639,19 +947,177 @@ def _handle_delete_customer(connection: PGConnection) -> None:
         print("Delete cancelled.")
         return
 
+    _delete_customer(connection, customer_id)
+
+
+def _delete_customer(connection: PGConnection, customer_id: int) -> bool:
     try:
         with connection:
             with connection.cursor() as cursor:
-                cursor.execute(
-                    "DELETE FROM customers WHERE customer_id = %s", (customer_id,)
+                execute_prepared(
+                    cursor,
+                    "stmt_delete_customer",
+                    "DELETE FROM customers WHERE customer_id = $1",
+                    (customer_id,),
                 )
                 if cursor.rowcount == 0:
                     print("Customer not found.")
-                    return
+                    return False
         print("Customer deleted successfully.")
+        return True
     except psycopg2.Error as exc:
         print(f"Failed to delete customer: {exc}")
+        return False
+
+
+# Handlers for each menu action. All but load_data take a pooled connection
+# as their first argument; see run_pipeline.
+_ACTION_DISPATCH: Dict[str, Callable[..., None]] = {
+    "load_data": _handle_load_data,
+    "create": _handle_create_customer,
+    "read": _handle_read_customer,
+    "update": _handle_update_customer,
+    "delete": _handle_delete_customer,
+}
+
+# In scripted runs (see ``main``) the role password is read from this
+# environment variable when --batch is given, instead of being prompted for.
+ROLE_PASSWORD_ENV = "UGE8_ROLE_PASSWORD"
+
+# Actions that can run from the command line; the rest need the prompts.
+BATCH_ACTIONS: Tuple[str, ...] = ("delete", "load_data", "read", "update")
+
+
+def _customer_id_arg(text: str) -> int:
+    """argparse type for --customer-id; accepts what the prompts accept."""
+
+    customer_id = _parse_int(text)
+    if customer_id is None:
+        raise argparse.ArgumentTypeError(f"not a whole number: {text!r}")
+    return customer_id
+
+
+def _build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description=(
+            "Run the ETL pipeline or the customer tools. Without --action the "
+            "tool runs interactively."
+        )
+    )
+    parser.add_argument("--role", choices=sorted(ROLE_PERMISSIONS))
+    parser.add_argument("--action", choices=BATCH_ACTIONS)
+    parser.add_argument(
+        "--yes",
+        action="store_true",
+        help="confirm load_data and delete without prompting",
+    )
+    parser.add_argument("--customer-id", type=_customer_id_arg)
+    parser.add_argument("--field", choices=CUSTOMER_FIELDS[1:])
+    parser.add_argument("--value")
+    parser.add_argument(
+        "--batch",
+        action="store_true",
+        help=f"read the role password from ${ROLE_PASSWORD_ENV} instead of a prompt",
+    )
+    return parser
+
+
+def _check_args(parser: argparse.ArgumentParser, args: argparse.Namespace) -> None:
+    """Reject option combinations that cannot run, before any password prompt.
+
+    Exits through ``parser.error`` (status 2) on a usage error.
+    """
+
+    action = args.action
+    if action is None:
+        stray = [
+            option
+            for option, value in (
+                ("--role", args.role),
+                ("--yes", args.yes),
+                ("--customer-id", args.customer_id),
+                ("--field", args.field),
+                ("--value", args.value),
+                ("--batch", args.batch),
+            )
+            if value not in (None, False)
+        ]
+        if stray:
+            parser.error(f"{', '.join(stray)} can only be used with --action")
+        return
+
+    role, customer_id = args.role, args.customer_id
+    if role is None:
+        parser.error("--action requires --role")
+    if args.batch and ROLE_PASSWORD_ENV not in os.environ:
+        parser.error(f"--batch requires the {ROLE_PASSWORD_ENV} variable")
+
+    if action == "load_data":
+        if not args.yes:
+            parser.error("load_data requires --yes")
+    elif action == "read":
+        if role == "store":
+            parser.error("read as store is only available interactively")
+        if role == "customer" and customer_id is None:
+            parser.error("read as customer requires --customer-id")
+    elif action == "update":
+        if customer_id is None or args.field is None or not args.value:
+            parser.error("update requires --customer-id, --field and --value")
+    elif action == "delete":
+        if customer_id is None or not args.yes:
+            parser.error("delete requires --customer-id and --yes")
+
+
+def _run_action(args: argparse.Namespace) -> int:
+    """Run a single action from the command line without any prompts.
+
+    ``args`` must have passed :func:`_check_args`. Returns the process exit
+    status: 0 on success and 1 if the login or the action failed.
+    """
+
+    role, action, customer_id = args.role, args.action, args.customer_id
+    if args.batch:
+        password = os.environ[ROLE_PASSWORD_ENV]
+    else:
+        password = _prompt_for_password("Enter password: ")
+    if not _check_credentials(role, _password_digest(password)):
+        print("Invalid credentials.")
+        return 1
+    if action not in ROLE_PERMISSIONS[role]:
+        print(f"The '{role}' role is not allowed to run '{action}'.")
+        return 1
+
+    if action == "load_data":
+        succeeded = _run_etl()
+    elif action == "read":
+        if role == "customer":
+            succeeded = _with_connection(_show_customer_data, customer_id)
+        else:
+            succeeded = _with_connection(_list_customers, customer_id)
+    elif action == "update":
+        succeeded = _with_connection(
+            _update_customer, customer_id, args.field, args.value
+        )
+    else:
+        succeeded = _with_connection(_delete_customer, customer_id)
+    return 0 if succeeded else 1
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    """Entry point: interactive by default, scripted when --action is given.
+
+    For example ``python main.py --role admin --action load_data --yes
+    --batch`` runs the whole ETL pipeline without a single prompt.
+    """
+
+    parser = _build_parser()
+    args = parser.parse_args(argv)
+    _check_args(parser, args)
+    if args.action is None:
+        run_pipeline()
+        return 0
+    return _run_action(args)
 
 
 if __name__ == "__main__":
-    run_pipeline()
+    sys.exit(main())
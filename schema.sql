@@ -57,11 +57,13 @@ CREATE TABLE products (
     CONSTRAINT fk_products_brand
         FOREIGN KEY (brand_id) REFERENCES brands (brand_id)
         ON UPDATE CASCADE
-        ON DELETE RESTRICT,
+        ON DELETE RESTRICT
+        DEFERRABLE INITIALLY IMMEDIATE,
     CONSTRAINT fk_products_category
         FOREIGN KEY (category_id) REFERENCES categories (category_id)
         ON UPDATE CASCADE
         ON DELETE RESTRICT
+        DEFERRABLE INITIALLY IMMEDIATE
 );
 
 CREATE INDEX idx_products_brand ON products (brand_id);
@@ -81,11 +83,13 @@ CREATE TABLE staffs (
     CONSTRAINT fk_staffs_store
         FOREIGN KEY (store_id) REFERENCES stores (store_id)
         ON UPDATE CASCADE
-        ON DELETE RESTRICT,
+        ON DELETE RESTRICT
+        DEFERRABLE INITIALLY IMMEDIATE,
     CONSTRAINT fk_staffs_manager
         FOREIGN KEY (manager_id) REFERENCES staffs (staff_id)
         ON UPDATE CASCADE
         ON DELETE SET NULL
+        DEFERRABLE INITIALLY IMMEDIATE
 );
 
 CREATE INDEX idx_staffs_store ON staffs (store_id);
@@ -98,11 +102,13 @@ CREATE TABLE stocks (
     CONSTRAINT fk_stocks_store
         FOREIGN KEY (store_id) REFERENCES stores (store_id)
         ON UPDATE CASCADE
-        ON DELETE CASCADE,
+        ON DELETE CASCADE
+        DEFERRABLE INITIALLY IMMEDIATE,
     CONSTRAINT fk_stocks_product
         FOREIGN KEY (product_id) REFERENCES products (product_id)
         ON UPDATE CASCADE
         ON DELETE RESTRICT
+        DEFERRABLE INITIALLY IMMEDIATE
 );
 
 -- Sales activity ----------------------------------------------------------
@@ -118,15 +124,18 @@ CREATE TABLE orders (
     CONSTRAINT fk_orders_customer
         FOREIGN KEY (customer_id) REFERENCES customers (customer_id)
         ON UPDATE CASCADE
-        ON DELETE RESTRICT,
+        ON DELETE RESTRICT
+        DEFERRABLE INITIALLY IMMEDIATE,
     CONSTRAINT fk_orders_store
         FOREIGN KEY (store_id) REFERENCES stores (store_id)
         ON UPDATE CASCADE
-        ON DELETE RESTRICT,
+        ON DELETE RESTRICT
+        DEFERRABLE INITIALLY IMMEDIATE,
     CONSTRAINT fk_orders_staff
         FOREIGN KEY (staff_id) REFERENCES staffs (staff_id)
         ON UPDATE CASCADE
         ON DELETE RESTRICT
+        DEFERRABLE INITIALLY IMMEDIATE
 );
 
 CREATE INDEX idx_orders_customer ON orders (customer_id);
@@ -144,11 +153,13 @@ CREATE TABLE order_items (
     CONSTRAINT fk_order_items_order
         FOREIGN KEY (order_id) REFERENCES orders (order_id)
         ON UPDATE CASCADE
-        ON DELETE CASCADE,
+        ON DELETE CASCADE
+        DEFERRABLE INITIALLY IMMEDIATE,
     CONSTRAINT fk_order_items_product
         FOREIGN KEY (product_id) REFERENCES products (product_id)
         ON UPDATE CASCADE
         ON DELETE RESTRICT
+        DEFERRABLE INITIALLY IMMEDIATE
 );
 
 -- Helpful views -----------------------------------------------------------
@@ -0,0 +1,88 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+import Extract  # noqa: E402
+
+
+@pytest.fixture
+def raw_tables(tmp_path, monkeypatch):
+    """The bundled CSV data, extracted with its Parquet cache kept in ``tmp_path``."""
+
+    monkeypatch.setattr(Extract, "CACHE_DIR", tmp_path / "cache")
+    return Extract.extract_data(REPO_ROOT)
+
+
+class StubCursor:
+    """Cursor double that records the SQL it is given instead of running it.
+
+    ``fetchall`` returns ``rows``, for example the secondary index listing
+    that ``begin_core_load`` asks for.
+    """
+
+    def __init__(self, rows=()):
+        self.rows = list(rows)
+        self.statements = []
+        self.copied = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def execute(self, statement, params=None):
+        self.statements.append(" ".join(str(statement).split()))
+
+    def fetchall(self):
+        return self.rows
+
+    def copy_expert(self, statement, stream):
+        self.statements.append(statement)
+        self.copied[statement.split()[1]] = stream.read()
+
+
+class StubConnection:
+    """Connection double whose transaction outcome is kept in ``committed``."""
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+        self.committed = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc_info):
+        self.committed = exc_type is None
+        return False
+
+    def cursor(self, name=None):
+        return self._cursor
+
+
+SECONDARY_INDEXES = [
+    (
+        "idx_products_brand",
+        "CREATE INDEX idx_products_brand ON public.products USING btree (brand_id)",
+    ),
+    (
+        "idx_orders_store",
+        "CREATE INDEX idx_orders_store ON public.orders USING btree (store_id)",
+    ),
+]
+
+
+@pytest.fixture
+def stub_connection():
+    return StubConnection(StubCursor(SECONDARY_INDEXES))
+
+
+@pytest.fixture
+def core_tables(raw_tables):
+    from Transform import prepare_relational_tables
+
+    return prepare_relational_tables(raw_tables)
@@ -0,0 +1,47 @@
+from pathlib import Path
+
+import Extract
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+
+def test_cached_read_keeps_declared_dtypes(tmp_path, monkeypatch):
+    monkeypatch.setattr(Extract, "CACHE_DIR", tmp_path / "cache")
+
+    cold = Extract.extract_data(REPO_ROOT)
+    assert any((tmp_path / "cache").glob("*.parquet"))
+    warm = Extract.extract_data(REPO_ROOT)
+
+    for name, frame in cold.items():
+        assert warm[name].dtypes.to_dict() == frame.dtypes.to_dict(), name
+    assert cold["orders"]["order_date"].dtype == "timestamp[s][pyarrow]"
+
+
+def test_streamed_chunks_match_whole_tables(tmp_path, monkeypatch):
+    monkeypatch.setattr(Extract, "CACHE_DIR", tmp_path / "cache")
+    monkeypatch.setattr(Extract, "STREAM_BLOCK_SIZE", 1 << 16)
+
+    cold = Extract.extract_data_streaming(REPO_ROOT)
+    cold = {name: list(cold[name]) for name in Extract.STREAMING_TABLES}
+    warm = Extract.extract_data_streaming(REPO_ROOT)
+    warm = {name: list(warm[name]) for name in Extract.STREAMING_TABLES}
+    whole = Extract.extract_data(REPO_ROOT)
+
+    for name in Extract.STREAMING_TABLES:
+        assert len(cold[name]) > 1
+        expected = whole[name].dtypes.to_dict()
+        for chunk in cold[name] + warm[name]:
+            assert chunk.dtypes.to_dict() == expected, name
+
+
+def test_cache_is_rebuilt_when_null_values_change(tmp_path, monkeypatch):
+    csv_path = REPO_ROOT / Extract.CSV_FILES["customers"]
+    cached = tmp_path / "customers.parquet"
+    before = Extract._read_one("customers", csv_path, cached)
+    assert before["phone"].isna().any()
+
+    monkeypatch.setattr(Extract, "NULL_VALUES", [""])
+    after = Extract._read_one("customers", csv_path, cached)
+
+    assert not after["phone"].isna().any()
+    assert (after["phone"] == "NULL").sum() == before["phone"].isna().sum()
@@ -0,0 +1,128 @@
+import pandas as pd
+import psycopg2
+import pytest
+
+import Load
+
+
+ROWS = [
+    (1, "tab\there", None),
+    (2, "new\nline\r", pd.NA),
+    (3, "back\\slash", True),
+    (4, "", False),
+]
+COPY_TEXT = "".join(
+    [
+        "1\ttab\\there\t\\N\n",
+        "2\tnew\\nline\\r\t\\N\n",
+        "3\tback\\\\slash\tt\n",
+        "4\t\tf\n",
+    ]
+)
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [
+        ("a\tb", "a\\tb"),
+        ("a\nb\rc", "a\\nb\\rc"),
+        ("C:\\temp", "C:\\\\temp"),
+        ("\\N", "\\\\N"),
+        (None, "\\N"),
+        (pd.NA, "\\N"),
+        (True, "t"),
+        (False, "f"),
+        (0, "0"),
+        (19.99, "19.99"),
+        ("", ""),
+    ],
+)
+def test_copy_text(value, expected):
+    assert Load._copy_text(value) == expected
+
+
+def test_copy_stream_read_all():
+    stream = Load._CopyStream(ROWS)
+
+    assert stream.read() == COPY_TEXT
+    assert stream.read() == ""
+    assert stream.row_count == len(ROWS)
+
+
+@pytest.mark.parametrize("size", [1, 2, 5, 13, 8192])
+def test_copy_stream_chunked_read_matches_read_all(size):
+    stream = Load._CopyStream(ROWS)
+
+    chunks = []
+    while chunk := stream.read(size):
+        assert len(chunk) <= size
+        chunks.append(chunk)
+
+    assert "".join(chunks) == COPY_TEXT
+    assert stream.row_count == len(ROWS)
+
+
+def test_copy_stream_readline():
+    stream = Load._CopyStream(ROWS)
+    lines = COPY_TEXT.splitlines(keepends=True)
+
+    assert stream.readline() == lines[0]
+    assert stream.read(4) == lines[1][:4]
+    assert stream.readline() == lines[1][4:]
+    assert [stream.readline() for _ in lines[2:]] == lines[2:]
+    assert stream.readline() == ""
+
+
+def test_copy_rows(stub_connection):
+    cursor = stub_connection.cursor()
+
+    count = Load._copy_rows(
+        cursor, "brands", ["brand_id", "brand_name"], ROWS, freeze=True
+    )
+
+    assert count == len(ROWS)
+    assert cursor.statements == [
+        "COPY brands (brand_id, brand_name) FROM STDIN WITH (FREEZE)"
+    ]
+    assert cursor.copied["brands"] == COPY_TEXT
+
+
+def test_deferred_checks_fire_before_indexes_are_rebuilt(stub_connection, core_tables):
+    cursor = stub_connection.cursor()
+
+    Load.write_core_tables(cursor, core_tables)
+
+    statements = cursor.statements
+    rebuild = next(
+        i
+        for i, sql in enumerate(statements)
+        if "CREATE INDEX idx_products_brand ON" in sql
+    )
+    last_copy = max(i for i, sql in enumerate(statements) if sql.startswith("COPY"))
+    assert last_copy < rebuild
+    sql = statements[rebuild]
+    assert sql.startswith("SET CONSTRAINTS ALL IMMEDIATE;")
+    assert "CREATE INDEX idx_orders_store ON" in sql
+
+
+@pytest.fixture
+def database():
+    try:
+        connection = Load.create_connection()
+    except (RuntimeError, psycopg2.Error) as exc:
+        pytest.skip(f"no PostgreSQL database available: {exc}")
+    yield connection
+    connection.close()
+
+
+def test_core_load_with_deferred_keys(database, core_tables):
+    """Runs the load the way ``main`` does, then rolls it back."""
+
+    try:
+        with database.cursor() as cursor:
+            cursor.execute("SET CONSTRAINTS ALL DEFERRED")
+            Load.write_core_tables(cursor, core_tables)
+            cursor.execute("SELECT count(*) FROM order_items")
+            assert cursor.fetchone()[0] == len(core_tables["order_items"])
+    finally:
+        database.rollback()
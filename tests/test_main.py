@@ -0,0 +1,177 @@
+import itertools
+import threading
+from pathlib import Path
+
+import psycopg2
+import pytest
+
+import Extract
+import Load
+import main
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+
+def _workers():
+    return [t for t in threading.enumerate() if t.name == "etl-prepare"]
+
+
+@pytest.fixture
+def prepared_items(monkeypatch):
+    """Replace the extract/transform steps with ``items``, set per test."""
+
+    items = []
+
+    def fake_prepared_tables():
+        for item in items:
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+
+    monkeypatch.setattr(main, "_iter_prepared_tables", fake_prepared_tables)
+    return items
+
+
+def test_tables_are_handed_over_in_order(prepared_items):
+    prepared_items.extend(("table", n) for n in range(10))
+
+    assert list(main._prepare_in_background()) == prepared_items
+    assert not _workers()
+
+
+def test_worker_error_is_raised_in_loader(prepared_items):
+    prepared_items.extend([("brands", 1), ValueError("bad csv")])
+    prepared = main._prepare_in_background()
+
+    assert next(prepared) == ("brands", 1)
+    with pytest.raises(ValueError, match="bad csv"):
+        next(prepared)
+    assert not _workers()
+
+
+def test_close_unblocks_worker_on_full_queue(monkeypatch):
+    queue_full = threading.Event()
+
+    def endless_tables():
+        for n in itertools.count():
+            # Item 0 is taken by the loader and the next PREPARE_QUEUE_SIZE
+            # fill the queue, so the worker blocks putting this one.
+            if n == main.PREPARE_QUEUE_SIZE + 1:
+                queue_full.set()
+            yield "table", n
+
+    monkeypatch.setattr(main, "_iter_prepared_tables", endless_tables)
+    prepared = main._prepare_in_background()
+
+    assert next(prepared) == ("table", 0)
+    assert queue_full.wait(timeout=5)
+    prepared.close()
+
+    assert not _workers()
+
+
+def test_close_before_start_leaves_no_worker(prepared_items):
+    prepared_items.append(("brands", 1))
+
+    main._prepare_in_background().close()
+
+    assert not _workers()
+
+
+@pytest.fixture
+def bundled_data(tmp_path, monkeypatch):
+    """Let ``_load_all`` extract the bundled CSV files into ``tmp_path``."""
+
+    monkeypatch.setattr(Extract, "CACHE_DIR", tmp_path / "cache")
+    monkeypatch.setattr(
+        main,
+        "extract_data_streaming",
+        lambda: Extract.extract_data_streaming(REPO_ROOT),
+    )
+
+
+def test_load_all(bundled_data, stub_connection, capsys):
+    assert main._load_all(stub_connection)
+
+    assert stub_connection.committed
+    out = capsys.readouterr().out
+    steps = [line for line in out.splitlines() if line.startswith("Step")]
+    assert [step.split(":")[0] for step in steps] == ["Step 1", "Step 2", "Step 3"]
+    statements = stub_connection.cursor().statements
+    assert statements[0].startswith("SET CONSTRAINTS ALL DEFERRED")
+    copied = [sql.split()[1] for sql in statements if sql.startswith("COPY")]
+    assert copied == [*Load.LOAD_ORDER, "order_summary"]
+    assert not _workers()
+
+
+def test_load_all_failure_rolls_back_and_stops_worker(
+    bundled_data, stub_connection, monkeypatch, capsys
+):
+    def failing_copy(statement, stream):
+        raise psycopg2.OperationalError("server closed the connection")
+
+    monkeypatch.setattr(stub_connection.cursor(), "copy_expert", failing_copy)
+
+    assert not main._load_all(stub_connection)
+
+    assert stub_connection.committed is False
+    assert "Failed to load data: server closed" in capsys.readouterr().out
+    assert not _workers()
+
+
+@pytest.fixture
+def no_prompt(monkeypatch):
+    def prompt(text):
+        raise AssertionError("prompted for a password")
+
+    monkeypatch.setattr(main, "_prompt_for_password", prompt)
+    monkeypatch.delenv(main.ROLE_PASSWORD_ENV, raising=False)
+
+
+@pytest.mark.parametrize(
+    "argv",
+    [
+        ["--role", "admin"],
+        ["--batch"],
+        ["--yes"],
+        ["--action", "read"],
+        ["--role", "admin", "--action", "create"],
+        ["--role", "admin", "--action", "load_data"],
+        ["--role", "admin", "--action", "load_data", "--yes", "--batch"],
+        ["--role", "store", "--action", "read"],
+        ["--role", "customer", "--action", "read"],
+        ["--role", "admin", "--action", "update", "--customer-id", "1"],
+        ["--role", "admin", "--action", "delete", "--customer-id", "1"],
+    ],
+)
+def test_usage_errors_come_before_the_password(no_prompt, argv):
+    with pytest.raises(SystemExit) as exc_info:
+        main.main(argv)
+
+    assert exc_info.value.code == 2
+
+
+def test_valid_arguments_reach_the_login(monkeypatch, capsys):
+    monkeypatch.setenv(main.ROLE_PASSWORD_ENV, "not the password")
+
+    status = main.main(["--role", "admin", "--action", "load_data", "--yes", "--batch"])
+
+    assert status == 1
+    assert "Invalid credentials." in capsys.readouterr().out
+
+
+def test_store_selection_without_database_settings(monkeypatch, capsys):
+    def missing_settings():
+        raise RuntimeError("Missing required database settings.")
+
+    monkeypatch.setattr(main, "_get_pool", missing_settings)
+
+    assert main._prompt_for_store_selection() is None
+    assert "Could not connect to the database" in capsys.readouterr().out
+
+
+def test_fetch_stores_reports_an_empty_table(stub_connection, capsys):
+    stub_connection.cursor().rows = []
+
+    assert main._fetch_stores(stub_connection) == []
+    assert "No stores available" in capsys.readouterr().out
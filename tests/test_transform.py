@@ -0,0 +1,65 @@
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+import Extract
+from Transform import _lookup_ids, build_order_summary, prepare_relational_tables
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+
+def _strings(values, name):
+    return pd.Series(values, name=name, dtype="string[pyarrow]")
+
+
+def test_lookup_ids_uses_last_id_for_duplicated_key():
+    keys = _strings(["Mireya", "Genna", "Mireya"], "first_name")
+    ids = pd.Series([1, 2, 3], name="staff_id", dtype="int32[pyarrow]")
+    values = _strings(["Genna", "Mireya"], "staff_name")
+
+    result = _lookup_ids(values, keys, ids)
+
+    assert result.tolist() == [2, 3]
+    assert result.dtype == "int32[pyarrow]"
+
+
+def test_lookup_ids_lists_unmapped_values():
+    keys = _strings(["Mireya"], "first_name")
+    ids = pd.Series([1], name="staff_id", dtype="int32[pyarrow]")
+    values = _strings(["Zoe", "Mireya", "Adam", "Zoe"], "staff_name")
+
+    with pytest.raises(ValueError, match="staff_name value\\(s\\): Adam, Zoe$"):
+        _lookup_ids(values, keys, ids)
+
+
+def test_duplicated_staff_first_name(raw_tables):
+    staffs = raw_tables["staffs"]
+    twin = staffs.iloc[[0]].assign(email="twin@bikes.shop")
+    raw_tables["staffs"] = pd.concat([staffs, twin], ignore_index=True)
+    name = twin["name"].iloc[0]
+
+    tables = prepare_relational_tables(raw_tables)
+
+    staff_ids = tables["staffs"]["staff_id"]
+    assert staff_ids.is_unique
+    handled = raw_tables["orders"]["staff_name"] == name
+    assert (tables["orders"]["staff_id"][handled] == staff_ids.iloc[-1]).all()
+
+
+def test_header_only_order_files(raw_tables, tmp_path):
+    full = prepare_relational_tables(raw_tables)
+    for name in Extract.STREAMING_TABLES:
+        header_only = tmp_path / f"{name}.csv"
+        header = (REPO_ROOT / Extract.CSV_FILES[name]).read_text().splitlines()[0]
+        header_only.write_text(header + "\n")
+        raw_tables[name] = Extract._iter_chunks(
+            name, header_only, tmp_path / "cache" / f"{name}.parquet"
+        )
+
+    tables = prepare_relational_tables(raw_tables)
+
+    for name in Extract.STREAMING_TABLES:
+        assert tables[name].empty
+        assert tables[name].dtypes.to_dict() == full[name].dtypes.to_dict()
+    assert build_order_summary(tables).empty